@@ -0,0 +1,57 @@
+"""Single-flight coalescing of concurrent identical requests."""
+
+import threading
+from collections.abc import Callable, Hashable
+from concurrent.futures import Future
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query so trivially different phrasings share a key"""
+    return " ".join(query.split()).casefold()
+
+
+class SingleFlight(Generic[T]):
+    """Share one in-flight call between concurrent callers with the same key.
+
+    The first caller for a key (the leader) runs the function; callers arriving
+    while it is still running wait for and receive the leader's result, or
+    re-raise its exception. Nothing is cached once the call has finished.
+    """
+
+    def __init__(self) -> None:
+        """Start with no calls in flight and zeroed counters"""
+        self._lock = threading.Lock()
+        self._in_flight: dict[Hashable, Future[T]] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """Run `fn` for `key`, or join the call already in flight for it"""
+        with self._lock:
+            existing = self._in_flight.get(key)
+            if existing is not None:
+                self.coalesced += 1
+            else:
+                future: Future[T] = Future()
+                self._in_flight[key] = future
+                self.executed += 1
+
+        if existing is not None:
+            return existing.result()
+
+        try:
+            future.set_result(fn())
+        except BaseException as exc:
+            future.set_exception(exc)
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+        return future.result()
+
+    def stats(self) -> dict[str, int]:
+        """Return counters of executed and coalesced calls"""
+        with self._lock:
+            return {"executed": self.executed, "coalesced": self.coalesced}
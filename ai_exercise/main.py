@@ -1,7 +1,10 @@
 """FastAPI app creation, main API routes."""
 
+import threading
+
 from fastapi import FastAPI
 
+from ai_exercise.coalescing import SingleFlight, normalize_query
 from ai_exercise.constants import SETTINGS, chroma_client, openai_client
 from ai_exercise.llm.completions import get_completion, create_prompt
 from ai_exercise.llm.embeddings import openai_ef
@@ -12,6 +15,7 @@ from ai_exercise.loading.document_loader import (
 from ai_exercise.models import (
     ChatOutput,
     ChatQuery,
+    ChatStatsOutput,
     HealthRouteOutput,
     LoadDocumentsOutput,
     EmptyDocumentsOutput
@@ -23,6 +27,18 @@ app = FastAPI()
 
 collection = create_collection(chroma_client, openai_ef, SETTINGS.collection_name)
 
+# Bumped whenever the collection changes so coalesced answers never span indexes
+index_version = 0
+index_version_lock = threading.Lock()
+chat_flight: SingleFlight[str] = SingleFlight()
+
+
+def bump_index_version() -> None:
+    """Move chat requests onto a new coalescing key after the index changes."""
+    global index_version
+    with index_version_lock:
+        index_version += 1
+
 
 @app.get("/health")
 def health_check_route() -> HealthRouteOutput:
@@ -33,7 +49,10 @@ def health_check_route() -> HealthRouteOutput:
 @app.get("/empty")
 def empty_docs_route() -> HealthRouteOutput:
     """Route to empty the vector storage"""
+    # Bump before and after so no request mid-empty shares a call with others
+    bump_index_version()
     empty_collection(collection)
+    bump_index_version()
     assert collection.count() == 0
     return EmptyDocumentsOutput(status="ok")
 
@@ -41,37 +60,52 @@ def empty_docs_route() -> HealthRouteOutput:
 @app.get("/load")
 async def load_docs_route() -> LoadDocumentsOutput:
     """Route to load documents into vector store. """
-
+    # Bump before and after so no request mid-load shares a call with others
+    bump_index_version()
     if SETTINGS.chunking_method == "bad":
         bad_chunking(collection) 
     elif SETTINGS.chunking_method == "better?":
         better_chunking(collection)
+    bump_index_version()
 
     return LoadDocumentsOutput(status="ok")
 
 
-@app.post("/chat")
-def chat_route(chat_query: ChatQuery) -> ChatOutput:
-    """Chat route to chat with the API."""
+def answer_query(query: str) -> str:
+    """Retrieve context for the query and get a completion from the LLM."""
     # Get relevant chunks from the collection
     relevant_chunks = get_relevant_chunks(
-        collection=collection, query=chat_query.query, k=SETTINGS.k_neighbors
+        collection=collection, query=query, k=SETTINGS.k_neighbors
     )
 
     # Create prompt with context
-    prompt = create_prompt(query=chat_query.query, context=relevant_chunks)
+    prompt = create_prompt(query=query, context=relevant_chunks)
     print(f"Prompt: {prompt}")
 
     # Get completion from LLM
-    result = get_completion(
+    return get_completion(
         client=openai_client,
         prompt=prompt,
         model=SETTINGS.openai_model,
     )
-    
+
+
+@app.post("/chat")
+def chat_route(chat_query: ChatQuery) -> ChatOutput:
+    """Chat route to chat with the API."""
+    # Concurrent identical queries share one retrieval + completion
+    key = (normalize_query(chat_query.query), index_version)
+    result = chat_flight.do(key, lambda: answer_query(chat_query.query))
+
     return ChatOutput(message=result)
 
 
+@app.get("/chat/stats")
+def chat_stats_route() -> ChatStatsOutput:
+    """Route to report how many chat requests were coalesced."""
+    return ChatStatsOutput(**chat_flight.stats())
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -39,3 +39,10 @@ class ChatOutput(BaseModel):
     """Model for the chat route output."""
 
     message: str
+
+
+class ChatStatsOutput(BaseModel):
+    """Model for the chat stats route output."""
+
+    executed: int
+    coalesced: int
@@ -0,0 +1,83 @@
+"""Tests for the /chat coalescing wiring in `ai_exercise/main.py`."""
+import asyncio
+import os
+import threading
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("fastapi")
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+from ai_exercise import main  # noqa: E402
+from ai_exercise.coalescing import SingleFlight  # noqa: E402
+from ai_exercise.models import ChatQuery  # noqa: E402
+from tests.test_coalescing import wait_until  # noqa: E402
+
+
+class FakeCollection:
+    """Stand-in for the Chroma collection that is always empty."""
+
+    def count(self) -> int:
+        return 0
+
+
+@pytest.fixture
+def blocked_answer(monkeypatch: pytest.MonkeyPatch) -> Iterator[threading.Event]:
+    """Swap in a fresh flight and an `answer_query` that waits on an event."""
+    release = threading.Event()
+
+    def answer_query(query: str) -> str:
+        release.wait(timeout=5)
+        return f"answer to {query}"
+
+    monkeypatch.setattr(main, "chat_flight", SingleFlight())
+    monkeypatch.setattr(main, "answer_query", answer_query)
+    monkeypatch.setattr(main, "collection", FakeCollection())
+    monkeypatch.setattr(main, "empty_collection", lambda collection: None)
+    yield release
+    release.set()
+
+
+def chat(query: str) -> str:
+    return main.chat_route(ChatQuery(query=query)).message
+
+
+def test_identical_chats_share_one_call(blocked_answer: threading.Event) -> None:
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(chat, q) for q in ("Hi", " hi ", "HI")]
+        wait_until(lambda: main.chat_flight.stats()["coalesced"] == 2)
+        blocked_answer.set()
+        results = {f.result() for f in futures}
+
+    assert len(results) == 1
+    assert main.chat_stats_route().model_dump() == {"executed": 1, "coalesced": 2}
+
+
+def test_empty_starts_a_new_call(blocked_answer: threading.Event) -> None:
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        before = pool.submit(chat, "hi")
+        wait_until(lambda: main.chat_flight.stats()["executed"] == 1)
+        main.empty_docs_route()
+        after = pool.submit(chat, "hi")
+        wait_until(lambda: main.chat_flight.stats()["executed"] == 2)
+        blocked_answer.set()
+        before.result()
+        after.result()
+
+    assert main.chat_stats_route().model_dump() == {"executed": 2, "coalesced": 0}
+
+
+def test_routes_bump_index_version(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(main, "collection", FakeCollection())
+    monkeypatch.setattr(main, "empty_collection", lambda collection: None)
+    monkeypatch.setattr(main, "better_chunking", lambda collection: None)
+    monkeypatch.setattr(main, "bad_chunking", lambda collection: None)
+
+    start = main.index_version
+    main.empty_docs_route()
+    assert main.index_version == start + 2
+
+    asyncio.run(main.load_docs_route())
+    assert main.index_version == start + 4
@@ -0,0 +1,77 @@
+"""Tests for `ai_exercise/coalescing.py`."""
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from ai_exercise.coalescing import SingleFlight, normalize_query
+
+
+def wait_until(condition: Callable[[], bool], timeout: float = 5) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            pytest.fail(f"condition not met within {timeout}s")
+        time.sleep(0.01)
+
+
+def test_normalize_query() -> None:
+    assert normalize_query("  What is  HRIS?\n") == "what is hris?"
+
+
+def test_concurrent_calls_are_coalesced() -> None:
+    flight: SingleFlight[str] = SingleFlight()
+    release = threading.Event()
+    calls = 0
+
+    def slow() -> str:
+        nonlocal calls
+        calls += 1
+        release.wait(timeout=5)
+        return "answer"
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(flight.do, "key", slow) for _ in range(4)]
+        try:
+            wait_until(lambda: flight.stats()["coalesced"] == 3)
+        finally:
+            release.set()
+        results = [f.result() for f in futures]
+
+    assert results == ["answer"] * 4
+    assert calls == 1
+    assert flight.stats() == {"executed": 1, "coalesced": 3}
+
+
+def test_sequential_calls_are_not_cached() -> None:
+    flight: SingleFlight[int] = SingleFlight()
+    assert flight.do("key", lambda: 1) == 1
+    assert flight.do("key", lambda: 2) == 2
+    assert flight.stats() == {"executed": 2, "coalesced": 0}
+
+
+def test_exception_is_shared_and_cleared() -> None:
+    flight: SingleFlight[int] = SingleFlight()
+    release = threading.Event()
+
+    def boom() -> int:
+        release.wait(timeout=5)
+        raise ValueError("upstream failed")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(flight.do, "key", boom)
+        wait_until(lambda: flight.stats()["executed"] == 1)
+        follower = pool.submit(flight.do, "key", lambda: 0)
+        try:
+            wait_until(lambda: flight.stats()["coalesced"] == 1)
+        finally:
+            release.set()
+
+        for future in (leader, follower):
+            with pytest.raises(ValueError, match="upstream failed"):
+                future.result()
+
+    assert flight.stats() == {"executed": 1, "coalesced": 1}
+    assert flight.do("key", lambda: 3) == 3